@@ -1,17 +1,192 @@
+import codecs
 import csv
+import importlib.util
 import string
 import argparse
 import random
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import chain, islice, repeat
 from datetime import datetime
 import os
 import time
 from datetime import datetime, timedelta
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+_PRINTABLE = frozenset(string.printable)
+
+
+def _fill_batch(rng, charset, codes_length, n, use_numba=False):
+    char_arr = np.frombuffer(charset.encode("ascii"), dtype=np.uint8)
+    if use_numba:
+        from generate_codes_numba import fill_codes
+
+        # Numba keeps its own MT19937 state, it is reseeded from our generator
+        # so every batch (and every worker process) gets a distinct stream.
+        codes = np.empty((n, codes_length), dtype=np.uint8)
+        seed = int(rng.integers(2**32))
+        fill_codes(char_arr, codes_length, n, codes, seed)
+    else:
+        idx = _draw_indices(rng, len(char_arr), n * codes_length)
+        codes = char_arr[idx.reshape(n, codes_length)]
+    return codes.view(f"|S{codes_length}").reshape(-1)
+
+
+def _fill_batch_worker(seed_sequence, charset, codes_length, n, use_numba):
+    rng = np.random.default_rng(seed_sequence)
+    return _unique_codes(_fill_batch(rng, charset, codes_length, n, use_numba), charset)
+
+
+def _draw_indices(rng, chars_number, size):
+    # Mask raw random bytes down to the next power of two and reject the
+    # values outside of the charset, nothing is rejected for 2, 4, 8, ...
+    mask = (1 << (chars_number - 1).bit_length()) - 1
+    acceptance = chars_number / (mask + 1)
+    parts = []
+    drawn = 0
+    while drawn < size:
+        draw_size = int((size - drawn) / acceptance * 1.05) + 64
+        raw = np.frombuffer(rng.bytes(draw_size), dtype=np.uint8) & mask
+        if mask + 1 != chars_number:
+            raw = raw[raw < chars_number]
+        parts.append(raw)
+        drawn += len(raw)
+    return np.concatenate(parts)[:size]
+
+
+def _pack_codes(codes, charset):
+    # Read each code as a number in base len(charset), which is its exact
+    # index in the code space as long as the space fits in 64 bits.
+    char_arr = np.frombuffer(charset.encode("ascii"), dtype=np.uint8)
+    char_index = np.zeros(256, dtype=np.uint64)
+    char_index[char_arr] = np.arange(len(char_arr), dtype=np.uint64)
+    chars = codes.view(np.uint8).reshape(len(codes), -1)
+    keys = np.zeros(len(codes), dtype=np.uint64)
+    for column in chars.T:
+        keys *= np.uint64(len(char_arr))
+        keys += char_index[column]
+    return keys
+
+
+def _unique_codes(codes, charset):
+    # np.unique sorts its result, keep the codes in the order they were drawn.
+    # Sorting packed integer keys is much cheaper than sorting byte strings,
+    # the sorted keys are returned too, or None when they do not fit in 64 bits.
+    if len(charset) ** codes.itemsize <= 2**64:
+        keys, first_index = np.unique(_pack_codes(codes, charset), return_index=True)
+    else:
+        keys = None
+        _, first_index = np.unique(codes, return_index=True)
+    return codes[np.sort(first_index)], keys
+
+
+def _unpack_keys(keys, charset, codes_length):
+    char_arr = np.frombuffer(charset.encode("ascii"), dtype=np.uint8)
+    chars = np.empty((len(keys), codes_length), dtype=np.uint8)
+    keys = keys.copy()
+    for column in range(codes_length - 1, -1, -1):
+        chars[:, column] = char_arr[keys % np.uint64(len(char_arr))]
+        keys //= np.uint64(len(char_arr))
+    return chars.view(f"|S{codes_length}").reshape(-1)
+
+
+class _FileRotator:
+    def __init__(self, file_paths, maxlines, encoding, use_csv):
+        """
+        Initializes a writer that spreads codes over a sequence of files.
+
+        Args:
+            file_paths (iterable): The paths of the files to write, in order.
+            maxlines (int): The number of codes after which the next file is opened.
+            encoding (str): The encoding of the files.
+            use_csv (bool): Whether to write the codes with csv.writer.
+        """
+        self.file_paths = iter(file_paths)
+        self.maxlines = maxlines
+        self.encoding = encoding
+        self.use_csv = use_csv
+        self.file = None
+        self.csv_writer = None
+        self.encoder = None
+        self.lines_written = 0
+        # Rotating, encoding and writing runs in a background thread while the
+        # next block is being generated, one block at a time to keep the order.
+        self.__executor = ThreadPoolExecutor(max_workers=1)
+        self.__pending = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def write(self, codes):
+        self.__wait()
+        self.__pending = self.__executor.submit(self.__write_block, codes)
+
+    def close(self):
+        try:
+            self.__wait()
+        finally:
+            self.__executor.shutdown()
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+    def __write_block(self, codes):
+        # Walk the block by offset, each file gets a slice of just its codes.
+        start = 0
+        while start < len(codes):
+            if self.file is None or self.lines_written == self.maxlines:
+                self.__rotate()
+            end = min(start + self.maxlines - self.lines_written, len(codes))
+            self.__write_codes(codes[start:end])
+            self.lines_written += end - start
+            start = end
+
+    def __rotate(self):
+        if self.file is not None:
+            self.file.close()
+        file_path = next(self.file_paths)
+        if self.use_csv:
+            self.file = open(file_path, "w", newline="", encoding=self.encoding)
+            self.csv_writer = csv.writer(self.file)
+        else:
+            self.file = open(file_path, "wb", buffering=1 << 20)
+            self.encoder = codecs.getincrementalencoder(self.encoding)()
+        self.lines_written = 0
+
+    def __wait(self):
+        if self.__pending is not None:
+            pending, self.__pending = self.__pending, None
+            pending.result()
+
+    def __write_codes(self, codes):
+        if self.use_csv:
+            self.csv_writer.writerows((code,) for code in codes)
+        else:
+            lines = "\r\n".join(codes) + "\r\n"
+            self.file.write(self.encoder.encode(lines))
+
 
 class CodeGenerator:
     RECOMMENDED_CHARS = "2345679ACDEFGHJKLMNPRSTUVXYZ"
-
-    def __init__(self, codes_count, codes_length, prefix=None, suffix=None):
+    BATCH_SIZE = 65536
+    MAX_BATCH_SIZE = 2**22
+    COMPLEMENT_LIMIT = 2**25
+    SINGLE_SHOT_PROBABILITY = 1e-4
+    WRITE_BLOCK = 65536
+    PARALLEL_THRESHOLD = 10**6
+    MAX_WORKERS = 32
+    CSV_SPECIAL_CHARS = ',"\r\n'
+    PROGRESSBAR_LENGTH = 50
+
+    def __init__(
+        self, codes_count, codes_length, prefix=None, suffix=None, use_numba=False
+    ):
         """
         Initializes a UniqueCodeGenerator object with the given parameters.
 
@@ -20,9 +195,11 @@ class CodeGenerator:
             codes_length (int): The length of each unique code.
             prefix (str, optional): A prefix to add to each generated code. Defaults to None.
             suffix (str, optional): A suffix to add to each generated code. Defaults to None.
+            use_numba (bool, optional): Whether to fill batches with the Numba kernel instead of NumPy. Defaults to False.
 
         Raises:
             ValueError: If codes_count or codes_length are not integers, or if they are less than 1.
+            ValueError: If use_numba is set but NumPy or Numba is not installed.
         """
         try:
             self.codes_count = int(codes_count)
@@ -36,7 +213,6 @@ class CodeGenerator:
         if self.codes_length < 1:
             raise ValueError("Codes_count and codes_length must be greater than 0.")
         self.charset = ""
-        self.codes_set = set()
         self.encoding = ""
         self.prefix = prefix
         self.suffix = suffix
@@ -44,6 +220,14 @@ class CodeGenerator:
         self.filename_ext = ""
         self.maxlines = 0
         self.save_directory = ""
+        if use_numba and (np is None or importlib.util.find_spec("numba") is None):
+            raise ValueError("Numba and NumPy must be installed to use Numba.")
+        self.use_numba = use_numba
+        self._rng = np.random.default_rng() if np is not None else None
+        self._bars = [
+            "│" + "█" * i + "─" * (self.PROGRESSBAR_LENGTH - i) + "│"
+            for i in range(self.PROGRESSBAR_LENGTH + 1)
+        ]
 
     def build_character_set(self, charset, case, omit, add, custom_chars):
         if case == "lower":
@@ -71,9 +255,7 @@ class CodeGenerator:
                         "Custom character set contains duplicate characters."
                     )
                 # Check for invalid characters
-                invalid_chars = [
-                    char for char in custom_chars if char not in string.printable
-                ]
+                invalid_chars = sorted(set(custom_chars) - _PRINTABLE)
                 if invalid_chars:
                     raise ValueError(
                         f"Invalid characters in custom character set: {', '.join(invalid_chars)}"
@@ -85,7 +267,7 @@ class CodeGenerator:
             raise ValueError(f"Invalid charset: {self.charset}.")
 
         if omit is not None:
-            invalid_chars = [char for char in omit if char not in string.printable]
+            invalid_chars = sorted(set(omit) - _PRINTABLE)
             if invalid_chars:
                 raise ValueError(
                     f"Invalid characters in omit character set: {', '.join(invalid_chars)}"
@@ -96,7 +278,7 @@ class CodeGenerator:
                 )
 
         if add is not None:
-            invalid_chars = [char for char in add if char not in string.printable]
+            invalid_chars = sorted(set(add) - _PRINTABLE)
             if invalid_chars:
                 raise ValueError(
                     f"Invalid characters in add character set: {', '.join(invalid_chars)}"
@@ -104,6 +286,10 @@ class CodeGenerator:
             else:
                 self.charset += add
 
+        # A repeated character would spell the same code twice, keep only
+        # its first occurrence so every code has a single index.
+        self.charset = "".join(dict.fromkeys(self.charset))
+
         if not self.charset:
             raise ValueError("Used character set is empty.")
 
@@ -138,24 +324,179 @@ class CodeGenerator:
                 f"Cannot generate {self.codes_count} codes of length {self.codes_length} from a character set of length {len(self.charset)}."
             )
 
+        if np is None:
+            return self.__generate_codes_python()
+        if probability < self.SINGLE_SHOT_PROBABILITY:
+            return self.__generate_codes_single_shot()
+        return self.__generate_codes_batched()
+
+    def __generate_codes_single_shot(self):
+        start_time = time.time()
+
+        # Collisions are rare enough to draw everything at once with a
+        # small slack and deduplicate in C, topping up if it falls short.
+        codes = self.__generate_parallel(int(self.codes_count * 1.01) + 16)
+        while len(codes) < self.codes_count:
+            missing = self.codes_count - len(codes)
+            codes = self.__unique_codes(
+                np.concatenate((codes, self._generate_batch(missing + 16)))
+            )
+
+        self.__update_progress(self.codes_count, self.codes_count, start_time)
+
+        for start_index in range(0, self.codes_count, self.BATCH_SIZE):
+            end_index = min(start_index + self.BATCH_SIZE, self.codes_count)
+            yield codes[start_index:end_index].tolist()
+
+    def __generate_codes_batched(self):
+        # Every emitted code is remembered as its index in the code space,
+        # 8 bytes each in a sorted array. Dense spaces have at most
+        # codes_count / SINGLE_SHOT_PROBABILITY codes, so the index fits in
+        # 64 bits for any run whose codes fit in memory.
+        seen_keys = np.empty(0, dtype=np.uint64)
         codes_generated = 0
         start_time = time.time()
+        combinations = len(self.charset) ** self.codes_length
 
         while codes_generated < self.codes_count:
-            code = "".join(
-                random.choice(self.charset) for _ in range(self.codes_length)
+            remaining = self.codes_count - codes_generated
+            if (
+                codes_generated >= combinations // 2
+                and combinations <= self.COMPLEMENT_LIMIT
+            ):
+                # Past half of a small space most draws are repeats, pick the
+                # rest straight from the codes that have not been emitted yet.
+                missing_keys = np.setdiff1d(
+                    np.arange(combinations, dtype=np.uint64),
+                    seen_keys,
+                    assume_unique=True,
+                )
+                keys = self._rng.choice(missing_keys, size=remaining, replace=False)
+                codes = _unpack_keys(keys, self.charset, self.codes_length)
+                self.__update_progress(self.codes_count, self.codes_count, start_time)
+                yield codes.tolist()
+                return
+
+            codes = self._generate_batch(self.__batch_size(codes_generated))
+            # Deduplicate on the packed keys, sorting integers is much cheaper
+            # than sorting byte strings, and keep the draw order of the rest.
+            keys, first_index = np.unique(
+                _pack_codes(codes, self.charset), return_index=True
             )
-            if self.prefix is not None:
-                code = self.prefix + code
-            if self.suffix is not None:
-                code = code + self.suffix
-            if code in self.codes_set:
-                continue
-            else:
-                self.codes_set.add(code)
-                codes_generated += 1
+            positions = np.searchsorted(seen_keys, keys)
+            is_new = np.ones(len(keys), dtype=bool)
+            if len(seen_keys):
+                found = seen_keys[np.minimum(positions, len(seen_keys) - 1)]
+                is_new = found != keys
+            new_index = np.sort(first_index[is_new])[:remaining]
+            new_keys = np.sort(_pack_codes(codes[new_index], self.charset))
+            seen_keys = np.insert(
+                seen_keys, np.searchsorted(seen_keys, new_keys), new_keys
+            )
+            codes = codes[new_index]
+            codes_generated += len(codes)
+
+            self.__update_progress(codes_generated, self.codes_count, start_time)
+            yield codes.tolist()
+
+    def __generate_codes_python(self):
+        codes_set = set()
+        codes_generated = 0
+        start_time = time.time()
+        report_step = max(1, self.codes_count // 200)
+        next_report = report_step
+
+        # Bind everything used per code to locals to skip attribute lookups.
+        # Codes are built as bytes directly, they are decoded when written.
+        choices = random.choices
+        charset = self.charset.encode("ascii")
+        codes_length = self.codes_length
+        codes_count = self.codes_count
+        add_codes = codes_set.update
+        codes = []
+
+        while codes_generated < codes_count:
+            step_end = min(next_report, codes_count)
+            drawn = [
+                bytes(choices(charset, k=codes_length))
+                for _ in range(step_end - codes_generated)
+            ]
+            # The dict drops repeats within the draw and keeps the draw order.
+            new_codes = [code for code in dict.fromkeys(drawn) if code not in codes_set]
+            add_codes(new_codes)
+            codes += new_codes
+            codes_generated += len(new_codes)
+
+            if codes_generated == step_end:
+                self.__update_progress(codes_generated, codes_count, start_time)
+                next_report += report_step
+                yield codes
+                codes = []
+
+    def __batch_size(self, codes_generated):
+        # The more of the code space is taken, the more of a draw are repeats,
+        # so oversample to expect all missing codes from the next draw.
+        remaining = self.codes_count - codes_generated
+        taken = codes_generated / len(self.charset) ** self.codes_length
+        batch_size = max(self.BATCH_SIZE, int(remaining / (1 - taken)))
+        return min(batch_size, self.MAX_BATCH_SIZE)
+
+    def _generate_batch(self, n):
+        """
+        Generates a batch of random codes using NumPy.
+
+        Args:
+            n (int): The number of codes to generate.
+
+        Returns:
+            numpy.ndarray: An array of n codes, each stored as codes_length bytes.
+        """
+        return _fill_batch(
+            self._rng, self.charset, self.codes_length, n, self.use_numba
+        )
 
-                self.__update_progress(codes_generated, self.codes_count, start_time)
+    def __generate_parallel(self, n):
+        if hasattr(os, "sched_getaffinity"):
+            cpus = len(os.sched_getaffinity(0))
+        else:
+            cpus = os.cpu_count() or 1
+        workers = min(cpus, self.MAX_WORKERS)
+        if workers < 2 or n < self.PARALLEL_THRESHOLD:
+            return self.__unique_codes(self._generate_batch(n))
+
+        # Every worker gets its own independent stream spawned from our generator.
+        seed_sequence = np.random.SeedSequence(int(self._rng.integers(2**63)))
+        sizes = [n // workers + (i < n % workers) for i in range(workers)]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            batches = executor.map(
+                _fill_batch_worker,
+                seed_sequence.spawn(workers),
+                repeat(self.charset),
+                repeat(self.codes_length),
+                sizes,
+                repeat(self.use_numba),
+            )
+            batches = list(batches)
+
+        # Workers already dropped their own repeats, only codes drawn by more
+        # than one worker are left. Merging the sorted keys finds them.
+        codes = np.concatenate([codes for codes, _ in batches])
+        if batches[0][1] is None:
+            return self.__unique_codes(codes)
+        keys = np.sort(np.concatenate([keys for _, keys in batches]))
+        repeated_keys = keys[1:][keys[1:] == keys[:-1]]
+        if len(repeated_keys):
+            codes_keys = _pack_codes(codes, self.charset)
+            is_repeated = np.isin(codes_keys, repeated_keys)
+            repeated_index = np.flatnonzero(is_repeated)
+            _, first_index = np.unique(codes_keys[repeated_index], return_index=True)
+            is_repeated[repeated_index[first_index]] = False
+            codes = codes[~is_repeated]
+        return codes
+
+    def __unique_codes(self, codes):
+        codes, _ = _unique_codes(codes, self.charset)
+        return codes
 
     def __check_probability(self):
         chars_number = len(self.charset)
@@ -165,11 +506,8 @@ class CodeGenerator:
 
     def __update_progress(self, current, total, start_time):
         progress = current / total
-        progressbar_length = 50
-        num_chars = int(progress * progressbar_length)
-        progress_bar = (
-            "│" + "█" * num_chars + "─" * (progressbar_length - num_chars) + "│"
-        )
+        num_chars = int(progress * self.PROGRESSBAR_LENGTH)
+        progress_bar = self._bars[num_chars]
         progress_codes = f"{current}/{total}"
 
         elapsed_time = time.time() - start_time
@@ -187,17 +525,32 @@ class CodeGenerator:
             flush=True,
         )
 
-    def __save_codes(self):
-        if not os.path.exists(self.save_directory):
-            os.makedirs(self.save_directory)
+    def __save_codes(self, batches):
+        os.makedirs(self.save_directory, exist_ok=True)
 
-        codes_list = list(self.codes_set)
-        num_files = (len(codes_list) - 1) // self.maxlines + 1
+        codes = self.__format_codes(chain.from_iterable(batches))
 
-        for file_index in range(num_files):
-            start_index = file_index * self.maxlines
-            end_index = (file_index + 1) * self.maxlines
+        # Codes without delimiters, quotes or line breaks are written as plain
+        # lines, which is exactly what csv.writer would produce for them.
+        used_chars = self.charset + (self.prefix or "") + (self.suffix or "")
+        use_csv = any(char in self.CSV_SPECIAL_CHARS for char in used_chars)
 
+        try:
+            with _FileRotator(
+                self.__file_paths(), self.maxlines, self.encoding, use_csv
+            ) as rotator:
+                while True:
+                    block = list(islice(codes, self.WRITE_BLOCK))
+                    if not block:
+                        break
+                    rotator.write(block)
+        except IOError:
+            raise ValueError("Could not write into the file.")
+
+    def __file_paths(self):
+        num_files = (self.codes_count - 1) // self.maxlines + 1
+
+        for file_index in range(num_files):
             if num_files > 1:
                 output_file_name = (
                     f"{self.filename_base}_{file_index + 1}{self.filename_ext}"
@@ -205,24 +558,16 @@ class CodeGenerator:
             else:
                 output_file_name = f"{self.filename_base}{self.filename_ext}"
 
-            file_path = os.path.join(self.save_directory, output_file_name)
-
-            try:
-                with open(
-                    file_path,
-                    "w",
-                    newline="",
-                    encoding=self.encoding,
-                ) as csvfile:
-                    csv_writer = csv.writer(csvfile)
-                    for code in codes_list[start_index:end_index]:
-                        csv_writer.writerow(code.split())
-            except IOError:
-                raise ValueError("Could not write into the file.")
+            yield os.path.join(self.save_directory, output_file_name)
+
+    def __format_codes(self, codes):
+        prefix = self.prefix or ""
+        suffix = self.suffix or ""
+        for code in codes:
+            yield prefix + code.decode("ascii") + suffix
 
     def run(self):
-        self.__generate_codes()
-        self.__save_codes()
+        self.__save_codes(self.__generate_codes())
 
 
 def main():
@@ -260,6 +605,11 @@ def main():
         "--encoding", default="utf-8", help="Encoding of the output file"
     )
     parser.add_argument("--maxlines", type=int, help="Maximum number of codes per file")
+    parser.add_argument(
+        "--numba",
+        action="store_true",
+        help="Generate codes with the Numba kernel (requires numba)",
+    )
 
     args = parser.parse_args()
 
@@ -277,7 +627,9 @@ def main():
         filename = "codes_" + datetime.now().strftime("%Y%m%d%H%M%S") + ".csv"
 
     try:
-        cg = CodeGenerator(args.count, args.length, args.prefix, args.suffix)
+        cg = CodeGenerator(
+            args.count, args.length, args.prefix, args.suffix, args.numba
+        )
 
         cg.build_character_set(
             args.charset, args.case, args.omit, args.add, custom_charset
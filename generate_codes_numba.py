@@ -0,0 +1,21 @@
+import numpy as np
+from numba import njit
+
+
+@njit(cache=True)
+def fill_codes(charset, length, n, out, seed):
+    """
+    Fills an array with random codes, compiled with Numba.
+
+    Args:
+        charset (numpy.ndarray): The uint8 byte values of the character set.
+        length (int): The length of each code.
+        n (int): The number of codes to generate.
+        out (numpy.ndarray): A uint8 array of shape (n, length) to fill.
+        seed (int): A seed for Numba's internal generator.
+    """
+    np.random.seed(seed)
+    chars_number = len(charset)
+    for i in range(n):
+        for j in range(length):
+            out[i, j] = charset[np.random.randint(0, chars_number)]
@@ -0,0 +1,180 @@
+import codecs
+import csv
+import io
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import generate_codes
+from generate_codes import CodeGenerator, _draw_indices, _pack_codes, _unpack_keys
+
+
+def read_codes(directory):
+    codes = []
+    for file_name in sorted(os.listdir(directory)):
+        with open(os.path.join(directory, file_name), encoding="utf-8") as file:
+            codes.extend(file.read().splitlines())
+    return codes
+
+
+def assert_csv_files(directory, encoding):
+    # Every file must match csv.writer byte for byte and start with one BOM.
+    for file_name in os.listdir(directory):
+        with open(os.path.join(directory, file_name), "rb") as file:
+            data = file.read()
+        text = io.StringIO(data.decode(encoding), newline="")
+        codes = [row[0] for row in csv.reader(text)]
+
+        expected = io.BytesIO()
+        expected_file = io.TextIOWrapper(expected, encoding=encoding, newline="")
+        csv_writer = csv.writer(expected_file)
+        for code in codes:
+            csv_writer.writerow((code,))
+        expected_file.flush()
+
+        assert data == expected.getvalue()
+        assert data.count(codecs.BOM_UTF16) == 1
+
+
+def test_pack_unpack_roundtrip():
+    charset = "2345679ACDEFGHJKLMNPRSTUVXYZ"
+    keys = np.arange(len(charset) ** 3, dtype=np.uint64)
+    codes = _unpack_keys(keys, charset, 3)
+    assert len(set(codes.tolist())) == len(keys)
+    assert np.array_equal(_pack_codes(codes, charset), keys)
+
+
+def test_draw_indices_cover_charset():
+    rng = np.random.default_rng()
+    for chars_number in (2, 28, 64, 100):
+        indices = _draw_indices(rng, chars_number, 100000)
+        assert len(indices) == 100000
+        assert indices.max() == chars_number - 1
+
+
+def test_repeated_characters_are_dropped():
+    cg = CodeGenerator(10, 4)
+    cg.build_character_set("numeric", "upper", None, "2", None)
+    assert cg.charset == "0123456789"
+
+
+def test_full_space_is_unique(tmp_path):
+    cg = CodeGenerator(10**4, 4)
+    cg.build_character_set("numeric", "upper", None, "2", None)
+    cg.build_file("codes.csv", save_directory=str(tmp_path))
+    cg.run()
+
+    codes = read_codes(tmp_path)
+    assert len(codes) == 10**4
+    assert len(set(codes)) == 10**4
+
+
+def test_near_full_space_is_unique(tmp_path):
+    cg = CodeGenerator(20000, 3, prefix="X-")
+    cg.build_character_set("recommended", "upper", None, None, None)
+    cg.build_file("codes.csv", maxlines=3000, save_directory=str(tmp_path))
+    cg.run()
+
+    codes = read_codes(tmp_path)
+    assert len(os.listdir(tmp_path)) == 7
+    assert len(codes) == 20000
+    assert len(set(codes)) == 20000
+    assert all(code.startswith("X-") and len(code) == 5 for code in codes)
+
+
+def test_python_fallback_is_unique(tmp_path, monkeypatch):
+    monkeypatch.setattr(generate_codes, "np", None)
+    cg = CodeGenerator(1000, 3)
+    cg.build_character_set("numeric", "upper", None, None, None)
+    cg.build_file("codes.csv", maxlines=300, save_directory=str(tmp_path))
+    cg.run()
+
+    codes = read_codes(tmp_path)
+    assert len(os.listdir(tmp_path)) == 4
+    assert len(codes) == 1000
+    assert len(set(codes)) == 1000
+
+
+def test_sparse_space_is_unique(tmp_path):
+    cg = CodeGenerator(10**4, 10)
+    cg.build_character_set("recommended", "upper", None, None, None)
+    cg.build_file("codes.csv", save_directory=str(tmp_path))
+    cg.run()
+
+    codes = read_codes(tmp_path)
+    assert len(codes) == 10**4
+    assert len(set(codes)) == 10**4
+    assert all(len(code) == 10 for code in codes)
+
+
+def test_sparse_space_tops_up_repeats(tmp_path, monkeypatch):
+    generate_batch = CodeGenerator._generate_batch
+    calls = []
+
+    def generate_repeats(self, n):
+        # Every drawn code comes twice, the first draw falls short by half.
+        calls.append(n)
+        return np.repeat(generate_batch(self, n // 2 + 1), 2)[:n]
+
+    monkeypatch.setattr(CodeGenerator, "_generate_batch", generate_repeats)
+    cg = CodeGenerator(10**4, 10)
+    cg.build_character_set("numeric", "upper", None, None, None)
+    cg.build_file("codes.csv", save_directory=str(tmp_path))
+    cg.run()
+
+    codes = read_codes(tmp_path)
+    assert len(calls) > 1
+    assert len(codes) == 10**4
+    assert len(set(codes)) == 10**4
+
+
+def test_parallel_draw_is_unique(monkeypatch):
+    monkeypatch.setattr(
+        os, "sched_getaffinity", lambda pid: {0, 1, 2, 3}, raising=False
+    )
+    monkeypatch.setattr(os, "cpu_count", lambda: 4)
+    monkeypatch.setattr(CodeGenerator, "PARALLEL_THRESHOLD", 1000)
+    cg = CodeGenerator(10**4, 10)
+    cg.build_character_set("recommended", "upper", None, None, None)
+
+    codes = cg._CodeGenerator__generate_parallel(10**4)
+    assert len(codes) == 10**4
+    assert len(set(codes.tolist())) == 10**4
+
+
+def test_parallel_draw_drops_repeats_across_workers(monkeypatch):
+    monkeypatch.setattr(
+        os, "sched_getaffinity", lambda pid: {0, 1, 2, 3}, raising=False
+    )
+    monkeypatch.setattr(os, "cpu_count", lambda: 4)
+    monkeypatch.setattr(CodeGenerator, "PARALLEL_THRESHOLD", 1000)
+    cg = CodeGenerator(100, 3)
+    cg.build_character_set("numeric", "upper", None, None, None)
+
+    # Every worker draws most of the 1000 codes, so they overlap heavily.
+    codes = cg._CodeGenerator__generate_parallel(10**4).tolist()
+    assert len(codes) == len(set(codes))
+    assert len(codes) > 990
+
+
+def test_csv_output_matches_csv_writer(tmp_path):
+    cg = CodeGenerator(1000, 6, prefix='"')
+    cg.build_character_set("numeric", "upper", None, ",", None)
+    cg.build_file("codes.csv", 300, "utf-16", save_directory=str(tmp_path))
+    cg.run()
+
+    assert len(os.listdir(tmp_path)) == 4
+    assert_csv_files(tmp_path, "utf-16")
+
+
+def test_plain_output_matches_csv_writer(tmp_path):
+    cg = CodeGenerator(1000, 6)
+    cg.build_character_set("recommended", "upper", None, None, None)
+    cg.build_file("codes.csv", 300, "utf-16", save_directory=str(tmp_path))
+    cg.run()
+
+    assert len(os.listdir(tmp_path)) == 4
+    assert_csv_files(tmp_path, "utf-16")